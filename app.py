@@ -2,9 +2,13 @@
 import pandas as pd
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
-import plotly.express as px
+from dash.dependencies import Input, Output, ClientsideFunction
 import os
+import time
+from functools import lru_cache
+from pandas.api.types import union_categoricals
+
+import validacion
 # ============================
 # 1. Cargar y normalizar datos (estable + robusto)
 # ============================
@@ -12,12 +16,14 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(BASE_DIR, "data", "production_data.csv")
 
-# Leer CSV (estable)
+# Leer solo la cabecera para resolver el esquema antes de la ingesta por lotes
 df_raw = pd.read_csv(
     DATA_PATH,
     encoding="utf-8-sig",
-    sep=","
+    sep=",",
+    nrows=0
 )
+columnas_originales = df_raw.columns
 
 # Normalizar headers
 df_raw.columns = (
@@ -61,24 +67,66 @@ for logical_name, candidates in COLUMN_MAP.items():
     resolved[logical_name] = col
 
 # ----------------------------
-# Modelo interno canónico
+# Ingesta por lotes + validación
 # ----------------------------
 
-df = pd.DataFrame({
-    "Planta": df_raw[resolved["plant_id"]],
-    "Linea": df_raw[resolved["line_id"]],
-    "Fecha": pd.to_datetime(df_raw[resolved["timestamp"]], errors="coerce"),
-    "Produccion": df_raw[resolved["units_produced"]],
-    "Defectos": df_raw[resolved["defects"]],
-})
+CHUNK_SIZE = 1_000_000
+
+# Planta y línea como categorías: menos memoria y factorización inmediata
+original = dict(zip(df_raw.columns, columnas_originales))
+lotes = pd.read_csv(
+    DATA_PATH,
+    encoding="utf-8-sig",
+    sep=",",
+    chunksize=CHUNK_SIZE,
+    dtype={original[resolved["plant_id"]]: "category",
+           original[resolved["line_id"]]: "category"}
+)
+
+validador = validacion.ValidadorIngesta()
+partes = []
+t_ingesta = time.perf_counter()
+
+for lote_raw in lotes:
+    lote_raw.columns = df_raw.columns
+
+    # Modelo interno canónico
+    lote = pd.DataFrame({
+        "Planta": lote_raw[resolved["plant_id"]],
+        "Linea": lote_raw[resolved["line_id"]],
+        "Fecha": pd.to_datetime(lote_raw[resolved["timestamp"]], errors="coerce"),
+        "Produccion": lote_raw[resolved["units_produced"]],
+        "Defectos": lote_raw[resolved["defects"]],
+    })
+
+    # Filas inválidas a cuarentena (antes: dropna silencioso)
+    partes.append(validador.validar_lote(lote, lote_raw[resolved["timestamp"]]))
+
+# Cada lote trae sus propias categorías; se unen para que Planta y Linea sigan
+# siendo categóricas (códigos enteros en lugar de un objeto str por fila, cuyos
+# refcounts los workers tocarían al leerlos y romperían el copy-on-write)
+categoricas = {
+    columna: union_categoricals([p[columna] for p in partes]).remove_unused_categories()
+    for columna in ("Planta", "Linea")
+}
+df = pd.concat([p.drop(columns=list(categoricas)) for p in partes], ignore_index=True)
+df = df.assign(**categoricas)[partes[0].columns]
+t_ingesta = time.perf_counter() - t_ingesta
+
+# Tabla lateral de filas rechazadas y métricas de calidad por planta
+df_cuarentena = validador.cuarentena()
+calidad_por_planta = validador.metricas()
+
+# Reparto del tiempo de ingesta (la validación incluye el filtrado de filas
+# que antes hacía dropna)
+t_lectura = t_ingesta - validador.segundos
+print(f"INGESTA: {len(df):,} filas válidas, {len(df_cuarentena):,} en cuarentena "
+      f"(lectura {t_lectura:.2f}s + validación {validador.segundos:.2f}s)")
 
 # ----------------------------
 # Enriquecimiento de datos
 # ----------------------------
 
-# Eliminar filas inválidas
-df = df.dropna(subset=["Planta", "Fecha", "Produccion"])
-
 # Paros simulados (min)
 df["Paros_min"] = (df["Defectos"].fillna(0) * 5).clip(0, 120)
 
@@ -92,15 +140,101 @@ df["Turno"] = df["Fecha"].dt.hour.apply(
     else "Noche"
 )
 
+# Particiones por planta: se construyen una sola vez al importar el módulo.
+# Bajo gunicorn con preload_app viven en el proceso maestro y los workers
+# las comparten copy-on-write en lugar de volver a filtrar el DataFrame completo.
+df_por_planta = {
+    planta: grupo.sort_values("Fecha")
+    for planta, grupo in df.groupby("Planta", observed=True)
+}
+
+# ----------------------------
+# Datos columnares para el navegador (dcc.Store)
+# ----------------------------
+
+GRANULARIDADES = {"diaria": "Diaria", "registro": "Por registro"}
+
+# El detalle por registro se pide al servidor y solo para rangos cortos
+MAX_DIAS_REGISTRO = 31
+
+
+def _columnas(serie):
+    # Lista JSON-serializable (NaN -> null)
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+def columnas_planta(dfp, granularidad):
+    """Corte columnar compacto de una planta para los callbacks de cliente.
+
+    ``disp_sum`` y ``n`` permiten que el navegador calcule la disponibilidad
+    promedio exacta sobre registros aunque los datos vengan agregados por día.
+    """
+    if granularidad == "diaria":
+        dfp = (
+            dfp.groupby(dfp["Fecha"].dt.floor("D"))
+            .agg(
+                Produccion=("Produccion", "sum"),
+                Defectos=("Defectos", "sum"),
+                Paros_min=("Paros_min", "mean"),
+                disp_sum=("Disponibilidad_%", "sum"),
+                n=("Disponibilidad_%", "size"),
+            )
+            .reset_index()
+        )
+        turno = [None] * len(dfp)
+    else:
+        dfp = dfp.assign(disp_sum=dfp["Disponibilidad_%"], n=1)
+        turno = dfp["Turno"].tolist()
+
+    return {
+        "granularidad": granularidad,
+        "fecha": dfp["Fecha"].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist(),
+        "produccion": _columnas(dfp["Produccion"]),
+        "defectos": _columnas(dfp["Defectos"]),
+        "paros": _columnas(dfp["Paros_min"].round(2)),
+        "disp_sum": _columnas(dfp["disp_sum"]),
+        "n": dfp["n"].astype(int).tolist(),
+        "turno": turno,
+    }
+
+
+# Agregado diario por planta: se construye bajo demanda en cada worker (no en el
+# import, para no duplicar el dataset como objetos Python en el proceso maestro).
+# Solo se llama con plantas existentes, así que la caché tiene una entrada por planta.
+@lru_cache(maxsize=None)
+def datos_diarios(planta):
+    return columnas_planta(df_por_planta[planta], "diaria")
+
+
 # ============================
 # 2. Inicializar la app
 # ============================
-app = dash.Dash(__name__)
+# compress=True: respuestas (figuras JSON incluidas) con brotli/gzip vía flask-compress
+app = dash.Dash(__name__, compress=True)
 app.title = "Dashboard Producción Global"
 
+# Servidor Flask subyacente (punto de entrada WSGI, ver wsgi.py)
+server = app.server
+
 # ============================
 # 3. Layout del dashboard
 # ============================
+def tabla_calidad(metricas):
+    # Solo se muestran las reglas que han marcado alguna fila
+    columnas = ["filas", "validas", "cuarentena", "calidad_%"] + [
+        c for c in metricas.columns[4:] if metricas[c].any()
+    ]
+    celda = {"border": "1px solid #ccc", "padding": "6px 10px", "textAlign": "right"}
+    return html.Table([
+        html.Thead(html.Tr([html.Th("Planta", style=celda)] +
+                           [html.Th(c, style=celda) for c in columnas])),
+        html.Tbody([
+            html.Tr([html.Td(planta, style=celda)] +
+                    [html.Td(f"{fila[c]:,}", style=celda) for c in columnas])
+            for planta, fila in metricas.astype(object).iterrows()
+        ])
+    ], style={"borderCollapse": "collapse", "margin": "0 auto"})
+
 app.layout = html.Div([
     html.H1("🏭 Dashboard de Producción Global", style={"textAlign": "center"}),
 
@@ -126,9 +260,27 @@ app.layout = html.Div([
                 end_date=df["Fecha"].max(),
                 display_format="YYYY-MM-DD"
             )
-        ], style={"width": "45%", "display": "inline-block", "padding": "10px"})
+        ], style={"width": "45%", "display": "inline-block", "padding": "10px"}),
+
+        html.Div([
+            html.Label("Granularidad:"),
+            dcc.RadioItems(
+                id="granularidad-radio",
+                options=[{"label": v, "value": k} for k, v in GRANULARIDADES.items()],
+                value="diaria",
+                inline=True
+            )
+        ], style={"padding": "10px"})
     ], style={"textAlign": "center"}),
 
+    # Agregado diario de la planta seleccionada; los filtros de fecha y los KPIs
+    # se resuelven en el navegador
+    dcc.Store(id="datos-planta"),
+    # Detalle por registro (solo en granularidad "registro", rango acotado):
+    # el navegador escribe la solicitud y solo entonces responde el servidor
+    dcc.Store(id="solicitud-registro"),
+    dcc.Store(id="datos-registro"),
+
     html.Hr(),
 
     # --------------------------
@@ -162,95 +314,96 @@ app.layout = html.Div([
 
         html.Div([dcc.Graph(id="grafico-dispersion")],
                  style={"width": "48%", "display": "inline-block", "padding": "10px"})
-    ])
+    ]),
+
+    html.Hr(),
+
+    # --------------------------
+    # Calidad de datos (validación de la ingesta)
+    # --------------------------
+    html.Div([
+        html.H3("Calidad de datos por planta"),
+        tabla_calidad(calidad_por_planta)
+    ], style={"padding": "10px"})
 ])
 
 # ============================
 # 4. Callbacks
 # ============================
+# Servidor: agregado diario, solo al cambiar de planta
 @app.callback(
+    Output("datos-planta", "data"),
+    Input("planta-dropdown", "value")
+)
+def update_datos_planta(planta):
+    # Un valor desconocido enviado por el cliente no pasa por la caché
+    if planta not in df_por_planta:
+        return dict(columnas_planta(df.iloc[0:0], "diaria"), planta=planta)
+    return dict(datos_diarios(planta), planta=planta)
+
+
+# Cliente: en granularidad diaria no hace nada (sin petición al servidor); en
+# "registro" escribe la solicitud de detalle para la planta y el rango actuales
+app.clientside_callback(
+    ClientsideFunction(namespace="dashboard", function_name="solicitar_registro"),
+    Output("solicitud-registro", "data"),
+    [Input("granularidad-radio", "value"),
+     Input("planta-dropdown", "value"),
+     Input("fecha-picker", "start_date"),
+     Input("fecha-picker", "end_date")]
+)
+
+
+# Servidor: detalle por registro de la solicitud, como máximo los últimos
+# MAX_DIAS_REGISTRO días del rango
+@app.callback(
+    Output("datos-registro", "data"),
+    Input("solicitud-registro", "data"),
+    prevent_initial_call=True
+)
+def update_datos_registro(solicitud):
+    if not solicitud:
+        return None
+    planta = solicitud["planta"]
+    start_date, end_date = solicitud["inicio"], solicitud["fin"]
+
+    # Misma semántica que el navegador: días completos, ambos extremos incluidos
+    dfp = df_por_planta.get(planta, df.iloc[0:0])
+    inicio = pd.Timestamp(start_date[:10])
+    fin = pd.Timestamp(end_date[:10]) + pd.Timedelta(days=1)
+    if not dfp.empty:
+        # El recorte se mide sobre los días con datos, no sobre los del picker
+        inicio = max(inicio, dfp["Fecha"].min().normalize())
+        fin = min(fin, dfp["Fecha"].max().normalize() + pd.Timedelta(days=1))
+    recortado = fin - inicio > pd.Timedelta(days=MAX_DIAS_REGISTRO)
+    if recortado:
+        inicio = fin - pd.Timedelta(days=MAX_DIAS_REGISTRO)
+
+    dfp = dfp[(dfp["Fecha"] >= inicio) & (dfp["Fecha"] < fin)]
+    return dict(columnas_planta(dfp, "registro"), solicitud=solicitud,
+                recortado=bool(recortado), max_dias=MAX_DIAS_REGISTRO)
+
+
+# Cliente: KPIs (siempre desde el agregado diario) y gráficos se recalculan en el
+# navegador (assets/dashboard.js)
+app.clientside_callback(
+    ClientsideFunction(namespace="dashboard", function_name="update_dashboard"),
     [Output("kpi-cards", "children"),
      Output("grafico-produccion", "figure"),
      Output("grafico-defectos", "figure"),
      Output("grafico-paros", "figure"),
      Output("grafico-dispersion", "figure")],
-    [Input("planta-dropdown", "value"),
+    [Input("datos-planta", "data"),
+     Input("datos-registro", "data"),
+     Input("granularidad-radio", "value"),
      Input("fecha-picker", "start_date"),
      Input("fecha-picker", "end_date")]
 )
-def update_dashboard(planta, start_date, end_date):
-    # Filtrar datos según planta y rango de fechas
-    dff = df[(df["Planta"] == planta) &
-             (df["Fecha"] >= start_date) &
-             (df["Fecha"] <= end_date)]
-
-    # ============================
-    # KPIs
-    # ============================
-    total_prod = dff["Produccion"].sum()
-    total_def = dff["Defectos"].sum()
-    prom_disp = round(dff["Disponibilidad_%"].mean(), 2)
-    
-    # OEE simulado = Disponibilidad * (1 - Defectos/Producción) * 100
-    if total_prod > 0:
-        calidad = 1 - (total_def / total_prod)
-    else:
-        calidad = 0
-    oee = round((prom_disp/100) * calidad * 100, 2)
-
-    kpis = [
-        html.Div([
-            html.H3("Producción Total", style={"color": "#2E86C1"}),
-            html.H2(f"{total_prod:,}")
-        ], style={"border": "1px solid #ccc", "padding": "15px", "borderRadius": "10px", "width": "22%", "textAlign": "center"}),
-
-        html.Div([
-            html.H3("Defectos Totales", style={"color": "#C0392B"}),
-            html.H2(f"{total_def:,}")
-        ], style={"border": "1px solid #ccc", "padding": "15px", "borderRadius": "10px", "width": "22%", "textAlign": "center"}),
-
-        html.Div([
-            html.H3("Disponibilidad Promedio", style={"color": "#27AE60"}),
-            html.H2(f"{prom_disp}%")
-        ], style={"border": "1px solid #ccc", "padding": "15px", "borderRadius": "10px", "width": "22%", "textAlign": "center"}),
-
-        html.Div([
-            html.H3("OEE (simulado)", style={"color": "#8E44AD"}),
-            html.H2(f"{oee}%")
-        ], style={"border": "1px solid #ccc", "padding": "15px", "borderRadius": "10px", "width": "22%", "textAlign": "center"})
-    ]
-
-    # ============================
-    # Gráfico Producción (línea)
-    # ============================
-    fig_prod = px.line(dff, x="Fecha", y="Produccion",
-                       title=f"Producción en el tiempo - {planta}",
-                       markers=True)
-
-    # ============================
-    # Gráfico Defectos (barras)
-    # ============================
-    fig_def = px.bar(dff, x="Fecha", y="Defectos",
-                     title=f"Defectos en el tiempo - {planta}")
-
-    # ============================
-    # Gráfico Paros (boxplot)
-    # ============================
-    fig_paros = px.box(dff, y="Paros_min",
-                       title=f"Distribución de Paros (min) - {planta}")
-
-    # ============================
-    # Gráfico Disponibilidad vs Producción (scatter)
-    # ============================
-    fig_disp = px.scatter(dff, x="Produccion", y="Disponibilidad_%", size="Defectos",
-                          title=f"Disponibilidad vs Producción - {planta}",
-                          hover_data=["Turno"])
-
-    return kpis, fig_prod, fig_def, fig_paros, fig_disp
 
 
 # ============================
 # 5. Ejecutar servidor
 # ============================
+# Solo desarrollo. En producción: gunicorn -c gunicorn.conf.py wsgi:server
 if __name__ == "__main__":
     app.run_server(debug=True)
@@ -1,6 +1,5 @@
+import os
 import pandas as pd
-import numpy as np
-from datetime import timedelta
 
 import dash
 from dash import dcc, html
@@ -8,10 +7,19 @@ from dash.dependencies import Input, Output
 import plotly.express as px
 import plotly.graph_objects as go
 
+import forecasting
+
 # ============================
 # 1. Cargar datos
 # ============================
-df = pd.read_csv("data/datos_produccion.csv", parse_dates=["Fecha"])
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "data", "datos_produccion.csv")
+
+df = pd.read_csv(DATA_PATH, parse_dates=["Fecha"])
+
+# Pronósticos precalculados (backtest + mejor modelo por planta); se leen de la
+# caché en disco si el CSV no ha cambiado
+pronosticos = forecasting.obtener_pronosticos(df, DATA_PATH)
 
 # ============================
 # 2. Inicializar app
@@ -190,34 +198,31 @@ def update_operativa(planta, start_date, end_date):
     Input("planta-forecast", "value")
 )
 def update_forecast(planta):
-    dff = df[df["Planta"] == planta].sort_values("Fecha")
-
-    # Preparar datos para regresión lineal simple
-    dff["t"] = np.arange(len(dff))  # índice de tiempo
-    X = dff["t"].values
-    y = dff["Produccion"].values
-
-    # Calcular regresión lineal (coeficientes)
-    coef = np.polyfit(X, y, 1)  # grado 1 → recta
-    poly = np.poly1d(coef)
+    res = pronosticos.get(planta)
+    if res is None:
+        return go.Figure()
 
-    # Predicción para los próximos 7 días
-    last_t = X[-1]
-    future_t = np.arange(last_t+1, last_t+8)
-    future_dates = [dff["Fecha"].max() + timedelta(days=i) for i in range(1, 8)]
-    future_pred = poly(future_t)
+    hist = res["historico"]
+    pron = res["pronostico"]
 
-    # Graficar histórico + forecast
+    # Graficar histórico + forecast con intervalo
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=dff["Fecha"], y=dff["Produccion"],
-                             mode="lines+markers", name="Histórico"))
-    fig.add_trace(go.Scatter(x=future_dates, y=future_pred,
+    fig.add_trace(go.Scatter(x=hist.index, y=hist.values,
+                             mode="lines", name="Histórico"))
+    fig.add_trace(go.Scatter(x=pron.index, y=pron["hi"], mode="lines",
+                             line=dict(width=0), showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=pron.index, y=pron["lo"], mode="lines",
+                             line=dict(width=0), fill="tonexty",
+                             fillcolor="rgba(255,0,0,0.15)", name="Intervalo 90%"))
+    fig.add_trace(go.Scatter(x=pron.index, y=pron["pred"],
                              mode="lines+markers", name="Forecast",
                              line=dict(dash="dot", color="red")))
 
-    fig.update_layout(title=f"Forecast de Producción (7 días) - {planta}",
+    mae = res["mae"][res["modelo"]]
+    fig.update_layout(title=f"Forecast de Producción (7 días) - {planta} "
+                            f"· modelo: {res['modelo']} (MAE backtest {mae:.1f})",
                       template="plotly_white",
-                      xaxis_title="Fecha", yaxis_title="Producción")
+                      xaxis_title="Fecha", yaxis_title="Producción por turno")
     return fig
 
 
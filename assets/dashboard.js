@@ -0,0 +1,173 @@
+// assets/dashboard.js
+// Callbacks de cliente: recalculan KPIs y gráficos a partir del agregado diario
+// del dcc.Store "datos-planta" sin volver al servidor cuando solo cambia el rango
+// de fechas. Solo en granularidad "registro" se escribe "solicitud-registro" y el
+// servidor responde con "datos-registro" para el rango seleccionado (acotado).
+// Dash carga automáticamente todos los .js de la carpeta assets/.
+
+(function () {
+    // ============================
+    // Utilidades
+    // ============================
+
+    // Los rangos se comparan a nivel de día ("YYYY-MM-DD"), con ambos extremos
+    // incluidos, igual en granularidad diaria y por registro (y que
+    // app.update_datos_registro en el servidor)
+    function dia(fecha) {
+        return fecha ? String(fecha).slice(0, 10) : null;
+    }
+
+    function valor(x) {
+        return x === null || x === undefined ? 0 : x;
+    }
+
+    function redondear(x) {
+        return Math.round(x * 100) / 100;
+    }
+
+    function tarjeta(titulo, color, texto) {
+        return {
+            namespace: "dash_html_components",
+            type: "Div",
+            props: {
+                children: [
+                    {namespace: "dash_html_components", type: "H3",
+                     props: {children: titulo, style: {color: color}}},
+                    {namespace: "dash_html_components", type: "H2",
+                     props: {children: texto}}
+                ],
+                style: {border: "1px solid #ccc", padding: "15px", borderRadius: "10px",
+                        width: "22%", textAlign: "center"}
+            }
+        };
+    }
+
+    function figura(trazas, titulo, ejeX, ejeY) {
+        return {
+            data: trazas,
+            layout: {
+                title: {text: titulo},
+                xaxis: {title: {text: ejeX}},
+                yaxis: {title: {text: ejeY}},
+                legend: {tracegroupgap: 0},
+                margin: {t: 60}
+            }
+        };
+    }
+
+    // ============================
+    // Filtro por rango de fechas
+    // ============================
+    function filtrar(datos, startDate, endDate) {
+        var inicio = dia(startDate);
+        var fin = dia(endDate);
+        var columnas = ["fecha", "produccion", "defectos", "paros", "disp_sum", "n", "turno"];
+        var out = {};
+        columnas.forEach(function (c) { out[c] = []; });
+
+        for (var i = 0; i < datos.fecha.length; i++) {
+            var d = dia(datos.fecha[i]);
+            if ((inicio && d < inicio) || (fin && d > fin)) {
+                continue;
+            }
+            columnas.forEach(function (c) { out[c].push(datos[c][i]); });
+        }
+        return out;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            // En granularidad diaria devuelve no_update: el callback de servidor
+            // que depende de la solicitud no se dispara
+            solicitar_registro: function (granularidad, planta, startDate, endDate) {
+                if (granularidad !== "registro" || !planta || !startDate || !endDate) {
+                    return window.dash_clientside.no_update;
+                }
+                return {planta: planta, inicio: dia(startDate), fin: dia(endDate)};
+            },
+
+            update_dashboard: function (diario, registro, granularidad, startDate, endDate) {
+                var no_update = window.dash_clientside.no_update;
+                if (!diario) {
+                    return no_update;
+                }
+                var planta = diario.planta;
+                var diaria = granularidad !== "registro";
+
+                // KPIs siempre desde el agregado diario: no cambian con la granularidad
+                var dff = filtrar(diario, startDate, endDate);
+
+                // ============================
+                // KPIs (mismas fórmulas que la versión de servidor)
+                // ============================
+                var totalProd = 0, totalDef = 0, dispSum = 0, n = 0;
+                for (var i = 0; i < dff.fecha.length; i++) {
+                    totalProd += valor(dff.produccion[i]);
+                    totalDef += valor(dff.defectos[i]);
+                    dispSum += valor(dff.disp_sum[i]);
+                    n += dff.n[i];
+                }
+                var promDisp = redondear(dispSum / n);
+                // OEE simulado = Disponibilidad * (1 - Defectos/Producción) * 100
+                var calidad = totalProd > 0 ? 1 - totalDef / totalProd : 0;
+                var oee = redondear((promDisp / 100) * calidad * 100);
+
+                var kpis = [
+                    tarjeta("Producción Total", "#2E86C1", totalProd.toLocaleString("en-US")),
+                    tarjeta("Defectos Totales", "#C0392B", totalDef.toLocaleString("en-US")),
+                    tarjeta("Disponibilidad Promedio", "#27AE60", promDisp + "%"),
+                    tarjeta("OEE (simulado)", "#8E44AD", oee + "%")
+                ];
+
+                // ============================
+                // Gráficos
+                // ============================
+                // Por registro: detalle pedido al servidor para esta planta y este
+                // rango (si aún no llegó, solo se actualizan los KPIs)
+                var sufijo = "";
+                if (!diaria) {
+                    var solicitud = registro && registro.solicitud;
+                    if (!solicitud || solicitud.planta !== planta ||
+                            solicitud.inicio !== dia(startDate) || solicitud.fin !== dia(endDate)) {
+                        return [kpis, no_update, no_update, no_update, no_update];
+                    }
+                    dff = filtrar(registro, startDate, endDate);
+                    if (registro.recortado) {
+                        sufijo = " (últimos " + registro.max_dias + " días del rango)";
+                    }
+                }
+                var fig_prod = figura(
+                    [{type: "scatter", mode: "lines+markers", x: dff.fecha, y: dff.produccion}],
+                    "Producción en el tiempo - " + planta + sufijo, "Fecha", "Produccion");
+
+                var fig_def = figura(
+                    [{type: "bar", x: dff.fecha, y: dff.defectos}],
+                    "Defectos en el tiempo - " + planta + sufijo, "Fecha", "Defectos");
+
+                var etiquetaParos = diaria ? "Paros medios diarios (min)" : "Paros (min)";
+                var fig_paros = figura(
+                    [{type: "box", y: dff.paros, name: ""}],
+                    "Distribución de " + etiquetaParos + " - " + planta + sufijo, "", "Paros_min");
+
+                var disponibilidad = dff.disp_sum.map(function (s, k) {
+                    return redondear(valor(s) / dff.n[k]);
+                });
+                var tamanos = dff.defectos.map(valor);
+                var maxTamano = Math.max.apply(null, tamanos.concat([1]));
+                var fig_disp = figura(
+                    [{
+                        type: "scatter", mode: "markers",
+                        x: dff.produccion, y: disponibilidad,
+                        text: diaria ? dff.fecha : dff.turno,
+                        hovertemplate: "Produccion=%{x}<br>Disponibilidad_%=%{y}<br>%{text}<extra></extra>",
+                        // Igual que px.scatter(size=...): área proporcional, tamaño máx. 20 px
+                        marker: {size: tamanos, sizemode: "area",
+                                 sizeref: 2 * maxTamano / (20 * 20), sizemin: 0}
+                    }],
+                    "Disponibilidad vs Producción - " + planta + sufijo, "Produccion", "Disponibilidad_%");
+
+                return [kpis, fig_prod, fig_def, fig_paros, fig_disp];
+            }
+        }
+    });
+})();
@@ -0,0 +1,312 @@
+# forecasting.py
+# Subsistema de forecasting: modelos estacionales, backtest rolling-origin en
+# paralelo y caché en disco invalidada por la versión de los datos.
+#
+# Precalcular la caché (opcional, app_tabs.py lo hace al arrancar si falta):
+#   python forecasting.py data/datos_produccion.csv
+import glob
+import hashlib
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# 1. Parámetros
+# ============================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+# Cambiar al modificar modelos o parámetros: invalida la caché existente
+MODELO_VERSION = "1"
+
+# Un punto de la serie por (día, turno); los turnos empiezan cada 8 h
+HORA_TURNO = {"Mañana": 6, "Tarde": 14, "Noche": 22}
+TURNOS_POR_DIA = 3
+FRECUENCIA = "8h"
+
+HORIZONTE = 7 * TURNOS_POR_DIA   # 7 días
+N_ORIGENES = 4                   # orígenes del backtest rolling-origin
+MIN_ENTRENAMIENTO = 2 * 7 * TURNOS_POR_DIA
+CUANTILES_INTERVALO = (0.05, 0.95)
+
+
+# ============================
+# 2. Series por planta
+# ============================
+def derivar_turno(fechas):
+    # Mismas reglas que app.py para datos sin columna Turno
+    hora = fechas.dt.hour
+    return pd.Series(
+        np.where((hora >= 6) & (hora < 14), "Mañana",
+                 np.where((hora >= 14) & (hora < 22), "Tarde", "Noche")),
+        index=fechas.index,
+    )
+
+
+def construir_series(df):
+    """Serie regular de Produccion por planta, con un punto por (día, turno).
+
+    Los huecos (p. ej. los NaN simulados en generar_datos.py) se interpolan.
+    """
+    d = df.dropna(subset=["Planta", "Fecha"])
+    turno = d["Turno"] if "Turno" in d.columns else derivar_turno(d["Fecha"])
+    slot = d["Fecha"].dt.normalize() + pd.to_timedelta(turno.map(HORA_TURNO), unit="h")
+
+    series = {}
+    for planta, g in d.assign(slot=slot).dropna(subset=["slot"]).groupby("Planta"):
+        s = g.groupby("slot")["Produccion"].sum(min_count=1)
+        idx = pd.date_range(s.index.min(), s.index.max(), freq=FRECUENCIA)
+        s = s.reindex(idx).interpolate(limit_direction="both")
+        if s.notna().any():
+            series[planta] = s
+    return series
+
+
+# ============================
+# 3. Modelos
+# ============================
+class TendenciaLineal:
+    """Recta por mínimos cuadrados (el modelo original de app_tabs.py)."""
+
+    def fit(self, y, idx):
+        self.n = len(y)
+        self.coef = np.polyfit(np.arange(self.n), y, 1)
+        return self
+
+    def predict(self, h, idx_futuro):
+        return np.polyval(self.coef, np.arange(self.n, self.n + h))
+
+
+class NaiveEstacional:
+    """Repite el último ciclo de longitud ``m``."""
+
+    def __init__(self, m):
+        self.m = m
+
+    def fit(self, y, idx):
+        self.ultimo = np.asarray(y[-self.m:], dtype=float)
+        return self
+
+    def predict(self, h, idx_futuro):
+        # np.resize repite el ciclo en orden; la fase coincide con la del futuro
+        return np.resize(self.ultimo, h)
+
+
+class HoltWinters:
+    """Holt-Winters aditivo; alpha/beta/gamma por búsqueda en rejilla (SSE a 1 paso)."""
+
+    REJILLA = [(a, b, g)
+               for a in (0.1, 0.3, 0.5)
+               for b in (0.0, 0.05)
+               for g in (0.1, 0.3)]
+
+    def __init__(self, m):
+        self.m = m
+
+    def _suavizar(self, y, alpha, beta, gamma):
+        m = self.m
+        nivel = y[:m].mean()
+        tendencia = (y[m:2 * m].mean() - y[:m].mean()) / m
+        estacion = y[:m] - nivel
+        sse = 0.0
+        for t in range(len(y)):
+            s = estacion[t % m]
+            if t >= m:
+                sse += (y[t] - (nivel + tendencia + s)) ** 2
+            nuevo_nivel = alpha * (y[t] - s) + (1 - alpha) * (nivel + tendencia)
+            tendencia = beta * (nuevo_nivel - nivel) + (1 - beta) * tendencia
+            estacion[t % m] = gamma * (y[t] - nuevo_nivel) + (1 - gamma) * s
+            nivel = nuevo_nivel
+        return nivel, tendencia, estacion, sse
+
+    def fit(self, y, idx):
+        y = np.asarray(y, dtype=float)
+        self.n = len(y)
+        mejor = None
+        for alpha, beta, gamma in self.REJILLA:
+            estado = self._suavizar(y, alpha, beta, gamma)
+            if mejor is None or estado[3] < mejor[3]:
+                mejor = estado
+        self.nivel, self.tendencia, self.estacion, _ = mejor
+        return self
+
+    def predict(self, h, idx_futuro):
+        k = np.arange(1, h + 1)
+        return self.nivel + k * self.tendencia + self.estacion[(self.n + k - 1) % self.m]
+
+
+class RidgeCalendario:
+    """Regresión ridge sobre tendencia + turno + día de la semana."""
+
+    def __init__(self, lam=1.0):
+        self.lam = lam
+
+    def _features(self, idx):
+        t = (idx - self.t0) / pd.Timedelta(FRECUENCIA) / self.escala
+        columnas = [np.ones(len(idx)), np.asarray(t, dtype=float)]
+        columnas += [(idx.hour == hora).astype(float) for hora in HORA_TURNO.values()]
+        columnas += [(idx.dayofweek == dia).astype(float) for dia in range(7)]
+        return np.column_stack(columnas)
+
+    def fit(self, y, idx):
+        self.t0, self.escala = idx[0], max(len(idx), 1)
+        X = self._features(idx)
+        penal = self.lam * np.eye(X.shape[1])
+        penal[0, 0] = 0.0  # sin penalizar el intercepto
+        self.w = np.linalg.solve(X.T @ X + penal, X.T @ np.asarray(y, dtype=float))
+        return self
+
+    def predict(self, h, idx_futuro):
+        return self._features(idx_futuro) @ self.w
+
+
+# Solo el nombre viaja entre procesos; cada worker construye su instancia
+MODELOS = {
+    "tendencia_lineal": TendenciaLineal,
+    "naive_turno": partial(NaiveEstacional, m=TURNOS_POR_DIA),
+    "naive_semanal": partial(NaiveEstacional, m=7 * TURNOS_POR_DIA),
+    "holt_winters": partial(HoltWinters, m=TURNOS_POR_DIA),
+    "ridge_calendario": RidgeCalendario,
+}
+
+
+# ============================
+# 4. Backtest rolling-origin
+# ============================
+def backtest(nombre, y, idx, horizonte=HORIZONTE, n_origenes=N_ORIGENES):
+    """Errores (real - predicho) de ``n_origenes`` cortes sucesivos de ``horizonte`` puntos."""
+    errores = []
+    for k in range(n_origenes, 0, -1):
+        corte = len(y) - k * horizonte
+        if corte < MIN_ENTRENAMIENTO:
+            continue
+        modelo = MODELOS[nombre]().fit(y[:corte], idx[:corte])
+        pred = modelo.predict(horizonte, idx[corte:corte + horizonte])
+        errores.append(y[corte:corte + horizonte] - pred)
+    return np.concatenate(errores) if errores else np.array([])
+
+
+def _evaluar(tarea):
+    planta, nombre, y, idx = tarea
+    return planta, nombre, backtest(nombre, y, idx)
+
+
+def _pool(n_jobs):
+    # Con "spawn" cada worker reimportaría el script principal (p. ej. app_tabs.py)
+    # y volvería a lanzar el backtest; en ese caso se ejecuta en serie.
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return ProcessPoolExecutor(max_workers=n_jobs,
+                               mp_context=multiprocessing.get_context("fork"))
+
+
+def calcular_pronosticos(df, horizonte=HORIZONTE, n_jobs=None):
+    """Backtest de todos los modelos en todas las plantas y forecast con el mejor.
+
+    Devuelve ``{planta: {"modelo", "mae", "historico", "pronostico"}}`` donde
+    ``pronostico`` es un DataFrame con columnas ``pred``, ``lo`` y ``hi``.
+    """
+    series = construir_series(df)
+    tareas = [(planta, nombre, s.to_numpy(dtype=float), s.index)
+              for planta, s in series.items()
+              for nombre in MODELOS]
+
+    pool = _pool(n_jobs)
+    if pool is None:
+        resultados = list(map(_evaluar, tareas))
+    else:
+        with pool:
+            resultados = list(pool.map(_evaluar, tareas))
+
+    errores = {}
+    for planta, nombre, err in resultados:
+        errores.setdefault(planta, {})[nombre] = err
+
+    pronosticos = {}
+    for planta, s in series.items():
+        mae = {nombre: float(np.mean(np.abs(err))) if len(err) else np.inf
+               for nombre, err in errores[planta].items()}
+        mejor = min(mae, key=mae.get)
+        if not np.isfinite(mae[mejor]):
+            mejor = "tendencia_lineal"
+
+        idx_futuro = pd.date_range(s.index[-1], periods=horizonte + 1,
+                                   freq=FRECUENCIA)[1:]
+        modelo = MODELOS[mejor]().fit(s.to_numpy(dtype=float), s.index)
+        pred = modelo.predict(horizonte, idx_futuro)
+
+        # Intervalo empírico a partir de los errores del backtest
+        err = errores[planta][mejor]
+        if len(err):
+            q_lo, q_hi = np.quantile(err, CUANTILES_INTERVALO)
+        else:
+            q_lo = q_hi = 0.0
+
+        pronosticos[planta] = {
+            "modelo": mejor,
+            "mae": mae,
+            "historico": s,
+            "pronostico": pd.DataFrame({
+                "pred": pred,
+                "lo": np.maximum(pred + q_lo, 0),
+                "hi": pred + q_hi,
+            }, index=idx_futuro),
+        }
+    return pronosticos
+
+
+# ============================
+# 5. Caché en disco
+# ============================
+def version_datos(data_path):
+    h = hashlib.sha256(f"{MODELO_VERSION}:{HORIZONTE}:{N_ORIGENES}".encode())
+    with open(data_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def obtener_pronosticos(df, data_path, cache_dir=CACHE_DIR, n_jobs=None):
+    """Lee los pronósticos de la caché o los calcula y los guarda.
+
+    La clave es el hash del CSV más la versión de los modelos, de modo que
+    cualquier cambio en los datos invalida la caché.
+    """
+    version = version_datos(data_path)
+    ruta = os.path.join(cache_dir, f"forecast_{version}.pkl")
+
+    if os.path.exists(ruta):
+        with open(ruta, "rb") as f:
+            return pickle.load(f)
+
+    pronosticos = calcular_pronosticos(df, n_jobs=n_jobs)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for antigua in glob.glob(os.path.join(cache_dir, "forecast_*.pkl")):
+        os.remove(antigua)
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(pronosticos, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, ruta)
+    return pronosticos
+
+
+# ============================
+# 6. CLI
+# ============================
+if __name__ == "__main__":
+    data_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        BASE_DIR, "data", "datos_produccion.csv")
+    df = pd.read_csv(data_path, parse_dates=["Fecha"])
+    pronosticos = obtener_pronosticos(df, data_path)
+
+    for planta, res in pronosticos.items():
+        print(f"{planta}: mejor modelo = {res['modelo']}")
+        for nombre, mae in sorted(res["mae"].items(), key=lambda x: x[1]):
+            print(f"    {nombre:<18} MAE = {mae:.1f}")
@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+# Configuración de producción. Todos los valores se pueden ajustar por entorno:
+#   GUNICORN_BIND, GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_TIMEOUT
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8050")
+
+# Procesos y threads por proceso
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+keepalive = 5
+
+# Cargar la app (CSV + particiones) una sola vez en el maestro;
+# los workers heredan los datos copy-on-write tras el fork.
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    # Mover los objetos ya cargados a la generación permanente del GC para que
+    # las recolecciones en los workers no toquen (y copien) esas páginas.
+    gc.freeze()
+    server.log.info("Datos precargados; %s workers x %s threads", workers, threads)
@@ -0,0 +1,182 @@
+# load_test.py
+# Prueba de carga: simula N usuarios concurrentes que abren el dashboard y
+# mueven sus filtros.
+#
+#   python load_test.py --url http://localhost:8050 --usuarios 100 --duracion 30
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# ============================
+# 1. Peticiones de un usuario
+# ============================
+# Cada sesión carga la página (index, layout y dependencias, como hace el
+# navegador) y lanza el callback inicial de planta. Después repite acciones:
+#   - cambio de fechas en granularidad diaria: se resuelve en el navegador
+#     (assets/dashboard.js) y no genera petición
+#   - cambio de planta: update_datos_planta (agregado diario)
+#   - rango en granularidad "registro": update_datos_registro
+ACCIONES = {"fechas_diaria": 0.5, "planta": 0.3, "registro": 0.2}
+ACCIONES_POR_SESION = 10
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept-Encoding": "br, gzip",
+}
+
+
+def buscar_componente(nodo, component_id):
+    # Recorre el layout serializado de Dash hasta encontrar el id buscado
+    if isinstance(nodo, dict):
+        props = nodo.get("props", {})
+        if props.get("id") == component_id:
+            return props
+        for valor in props.values():
+            encontrado = buscar_componente(valor, component_id)
+            if encontrado:
+                return encontrado
+    elif isinstance(nodo, list):
+        for hijo in nodo:
+            encontrado = buscar_componente(hijo, component_id)
+            if encontrado:
+                return encontrado
+    return None
+
+
+def leer_filtros(url):
+    with urllib.request.urlopen(f"{url}/_dash-layout") as resp:
+        layout = json.load(resp)
+    dropdown = buscar_componente(layout, "planta-dropdown")
+    picker = buscar_componente(layout, "fecha-picker")
+    dias = pd.date_range(pd.Timestamp(picker["start_date"]).normalize(),
+                         pd.Timestamp(picker["end_date"]).normalize(), freq="D")
+    return [op["value"] for op in dropdown["options"]], dias.strftime("%Y-%m-%d").tolist()
+
+
+def callback(output, input_id, input_prop, valor):
+    return json.dumps({
+        "output": f"{output}.data",
+        "outputs": {"id": output, "property": "data"},
+        "inputs": [{"id": input_id, "property": input_prop, "value": valor}],
+        "changedPropIds": [f"{input_id}.{input_prop}"],
+    }).encode("utf-8")
+
+
+def payload_planta(planta):
+    return callback("datos-planta", "planta-dropdown", "value", planta)
+
+
+def payload_registro(planta, dias):
+    # Mismo contenido que escribe dashboard.solicitar_registro en el navegador
+    i = random.randrange(len(dias))
+    j = min(len(dias) - 1, i + random.randint(0, 60))
+    solicitud = {"planta": planta, "inicio": dias[i], "fin": dias[j]}
+    return callback("datos-registro", "solicitud-registro", "data", solicitud)
+
+
+# ============================
+# 2. Usuario simulado
+# ============================
+def peticion(url, ruta, tipo, resultados, lock, payload=None):
+    headers = HEADERS if payload is not None else {"Accept-Encoding": HEADERS["Accept-Encoding"]}
+    req = urllib.request.Request(f"{url}{ruta}", data=payload, headers=headers)
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+        latencia, error = time.perf_counter() - t0, False
+    except Exception:
+        latencia, error = None, True
+    with lock:
+        if error:
+            resultados[tipo]["errores"] += 1
+        else:
+            resultados[tipo]["latencias"].append(latencia)
+
+
+def usuario(url, plantas, dias, fin, pausa, resultados, lock):
+    while time.time() < fin:
+        # Carga de la página
+        for ruta, tipo in (("/", "index"), ("/_dash-layout", "layout"),
+                           ("/_dash-dependencies", "dependencias")):
+            peticion(url, ruta, tipo, resultados, lock)
+        planta = plantas[0]
+        peticion(url, "/_dash-update-component", "planta", resultados, lock,
+                 payload_planta(planta))
+
+        for _ in range(ACCIONES_POR_SESION):
+            if time.time() >= fin:
+                return
+            time.sleep(pausa)
+            accion = random.choices(list(ACCIONES), weights=list(ACCIONES.values()))[0]
+            if accion == "planta":
+                planta = random.choice(plantas)
+                peticion(url, "/_dash-update-component", "planta", resultados, lock,
+                         payload_planta(planta))
+            elif accion == "registro":
+                peticion(url, "/_dash-update-component", "registro", resultados, lock,
+                         payload_registro(planta, dias))
+
+
+# ============================
+# 3. Ejecución
+# ============================
+def percentil(ordenadas, q):
+    return ordenadas[int(q * (len(ordenadas) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard")
+    parser.add_argument("--url", default="http://localhost:8050")
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--duracion", type=int, default=30, help="segundos")
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="segundos entre acciones de un usuario")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/")
+    plantas, dias = leer_filtros(url)
+
+    resultados = defaultdict(lambda: {"latencias": [], "errores": 0})
+    lock = threading.Lock()
+    inicio = time.time()
+    fin = inicio + args.duracion
+
+    with ThreadPoolExecutor(max_workers=args.usuarios) as pool:
+        for _ in range(args.usuarios):
+            pool.submit(usuario, url, plantas, dias, fin, args.pausa, resultados, lock)
+    # Tiempo real: incluye las peticiones que seguían en curso al vencer --duracion
+    transcurrido = time.time() - inicio
+
+    latencias = [x for r in resultados.values() for x in r["latencias"]]
+    total = len(latencias)
+    print(f"Usuarios concurrentes: {args.usuarios}")
+    print(f"Tiempo transcurrido:   {transcurrido:.1f} s")
+    print(f"Peticiones OK:         {total}")
+    print(f"Errores:               {sum(r['errores'] for r in resultados.values())}")
+    print(f"Requests/s:            {total / transcurrido:.1f}")
+    if total:
+        print(f"Latencia p50:          {statistics.median(latencias) * 1000:.1f} ms")
+        print(f"Latencia p95:          {percentil(sorted(latencias), 0.95) * 1000:.1f} ms")
+
+    print(f"\n{'tipo':<14}{'OK':>8}{'errores':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for tipo, r in sorted(resultados.items()):
+        ordenadas = sorted(r["latencias"])
+        if ordenadas:
+            p50 = f"{statistics.median(ordenadas) * 1000:.1f}"
+            p95 = f"{percentil(ordenadas, 0.95) * 1000:.1f}"
+        else:
+            p50 = p95 = "-"
+        print(f"{tipo:<14}{len(ordenadas):>8}{r['errores']:>9}{p50:>9}{p95:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# test_validacion.py
+# Pruebas del validador de ingesta (python -m pytest -q)
+import numpy as np
+import pandas as pd
+
+import validacion
+
+
+def lote(filas):
+    # Mismo modelo canónico que construye app.py a partir de cada lote del CSV
+    d = pd.DataFrame(filas, columns=["Planta", "Linea", "Fecha", "Produccion", "Defectos"])
+    d["Fecha"] = pd.to_datetime(d["Fecha"], errors="coerce")
+    return d
+
+
+def motivos(validador):
+    c = validador.cuarentena()
+    return dict(zip(c["Fecha"].dt.strftime("%H:%M"), c["motivos"]))
+
+
+# ============================
+# 1. Conteos como texto
+# ============================
+def test_conteo_no_numerico_devuelve_filas_numericas():
+    # Un solo valor no numérico hace que read_csv lea la columna del lote como texto
+    v = validacion.ValidadorIngesta()
+    validas = v.validar_lote(lote([
+        ["A", "L1", "2025-01-01 08:00", "120", "3"],
+        ["A", "L1", "2025-01-01 09:00", "110", "x"],
+        ["A", "L1", "2025-01-01 10:00", "abc", "1"],
+        ["A", "L1", "2025-01-01 11:00", "130", "2"],
+    ]))
+
+    assert validas["Produccion"].dtype.kind == "f"
+    assert validas["Defectos"].dtype.kind == "f"
+    assert validas["Produccion"].sum() == 250
+    assert (validas["Defectos"] >= 0).all()
+    assert motivos(v) == {"09:00": "defectos_invalidos", "10:00": "produccion_invalida"}
+    # La cuarentena conserva el valor original
+    assert v.cuarentena()["Defectos"].tolist() == ["x", "1"]
+
+
+# ============================
+# 2. Estado entre lotes
+# ============================
+def test_duplicado_entre_lotes():
+    v = validacion.ValidadorIngesta()
+    primero = v.validar_lote(lote([["A", "L1", "2025-01-01 08:00", 120, 3]]))
+    segundo = v.validar_lote(lote([
+        ["A", "L1", "2025-01-01 08:00", 125, 2],
+        ["A", "L1", "2025-01-01 09:00", 100, 1],
+    ]))
+
+    assert len(primero) == 1
+    assert segundo["Produccion"].tolist() == [100]
+    assert motivos(v) == {"08:00": "duplicado"}
+
+
+def test_fila_rechazada_no_cuenta_como_primera_aparicion():
+    v = validacion.ValidadorIngesta()
+    v.validar_lote(lote([["A", "L1", "2025-01-01 08:00", np.nan, 0]]))
+    validas = v.validar_lote(lote([["A", "L1", "2025-01-01 08:00", 10, 0]]))
+
+    assert validas["Produccion"].tolist() == [10]
+    assert motivos(v) == {"08:00": "produccion_nula"}
+
+
+def test_fuera_de_orden_entre_lotes_es_aviso():
+    v = validacion.ValidadorIngesta()
+    v.validar_lote(lote([["A", "L1", "2025-01-01 09:00", 100, 1]]))
+    validas = v.validar_lote(lote([["A", "L1", "2025-01-01 08:00", 120, 3]]))
+
+    assert len(validas) == 1
+    assert v.metricas().loc["A", "fuera_de_orden"] == 1
+
+
+def test_mismo_resultado_en_cualquier_orden_de_archivo():
+    # Un archivo ordenado por fecha usa la comprobación rápida; barajado, el
+    # cálculo general por serie. Las filas aceptadas deben coincidir.
+    rng = np.random.default_rng(0)
+    fechas = pd.date_range("2025-01-01", periods=40, freq="h")
+    filas = [[p, ln, f, 100, 1] for f in fechas for p in "AB" for ln in ("L1", "L2")]
+    filas += [filas[i] for i in rng.integers(0, len(filas), 15)]  # duplicados
+    ordenado = pd.DataFrame(filas, columns=["Planta", "Linea", "Fecha", "Produccion", "Defectos"])
+
+    resultados = []
+    for d in (ordenado, ordenado.sample(frac=1, random_state=1)):
+        v = validacion.ValidadorIngesta()
+        validas = pd.concat([v.validar_lote(d.iloc[i:i + 50]) for i in range(0, len(d), 50)])
+        resultados.append(set(map(tuple, validas[["Planta", "Linea", "Fecha"]].to_numpy())))
+        assert v.metricas()["duplicado"].sum() == 15
+
+    assert resultados[0] == resultados[1]
+    assert len(resultados[0]) == 160
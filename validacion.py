@@ -0,0 +1,375 @@
+# validacion.py
+# Validación de calidad de datos en la ingesta: reglas vectorizadas por lote,
+# cuarentena de filas inválidas con motivos y métricas de calidad por planta.
+import time
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# 1. Reglas
+# ============================
+# Cada regla ocupa un bit; una fila puede acumular varios motivos.
+# Las filas con algún bit de MOTIVOS se envían a cuarentena.
+MOTIVOS = {
+    "planta_nula": 1 << 0,
+    "fecha_nula": 1 << 1,
+    "fecha_invalida": 1 << 2,
+    "produccion_nula": 1 << 3,
+    "produccion_invalida": 1 << 4,
+    "produccion_negativa": 1 << 5,
+    "defectos_invalidos": 1 << 6,
+    "defectos_negativos": 1 << 7,
+    "conteo_no_entero": 1 << 8,
+    "defectos_mayor_produccion": 1 << 9,
+    "duplicado": 1 << 10,
+}
+
+# Avisos: se cuentan en las métricas pero la fila se conserva
+# (un registro fuera de orden sigue siendo un dato válido)
+AVISOS = {
+    "fuera_de_orden": 1 << 0,
+}
+
+CLAVE = ["Planta", "Linea", "Fecha"]
+SIN_PLANTA = "(sin planta)"
+NAT_I8 = np.iinfo(np.int64).min
+
+
+def _texto_motivos(mascaras, reglas):
+    # Traduce cada máscara a "motivo1;motivo2" resolviendo solo los valores únicos
+    unicos, inverso = np.unique(mascaras, return_inverse=True)
+    textos = np.array([
+        ";".join(nombre for nombre, bit in reglas.items() if m & bit)
+        for m in unicos
+    ], dtype=object)
+    return textos[inverso]
+
+
+def _codigos(columna):
+    # Códigos enteros + valores (NaN incluido como valor propio). Con columnas
+    # categóricas (como las lee app.py) se reutilizan los códigos existentes.
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        codigos = columna.cat.codes.to_numpy()
+        valores = pd.Index(columna.cat.categories, dtype=object)
+        nulos = codigos < 0
+        if nulos.any():
+            codigos = np.where(nulos, len(valores), codigos.astype(np.int32))
+            valores = valores.append(pd.Index([np.nan], dtype=object))
+        return codigos, valores
+    return pd.factorize(columna, use_na_sentinel=False)
+
+
+def _numerico(columna):
+    # Valores como float, filas vacías y filas con texto no interpretable.
+    # Si read_csv ya leyó la columna como número no hay nada que convertir.
+    if columna.dtype.kind in "iuf":
+        valores = columna.to_numpy(dtype=float)
+        return valores, np.isnan(valores), None
+    valores = pd.to_numeric(columna, errors="coerce").to_numpy(dtype=float)
+    vacia = columna.isna().to_numpy()
+    return valores, vacia, np.isnan(valores) & ~vacia
+
+
+def _no_enteros(valores):
+    # Posiciones con decimales (NaN también difiere de su trunc: se descarta aparte)
+    pos = np.flatnonzero(np.trunc(valores) != valores)
+    return pos[~np.isnan(valores[pos])]
+
+
+def _orden_por_serie(codigos, n_series):
+    # Orden estable por código de serie; con pocas series los códigos caben en
+    # int8/int16 y numpy usa radix sort
+    tipo = next((t for t in (np.int8, np.int16) if n_series <= np.iinfo(t).max), np.int64)
+    return np.argsort(codigos.astype(tipo, copy=False), kind="stable")
+
+
+# ============================
+# 2. Validador incremental
+# ============================
+class ValidadorIngesta:
+    """Valida lotes sucesivos del modelo canónico (Planta, Linea, Fecha, Produccion, Defectos).
+
+    Guarda entre lotes las fechas aceptadas por (Planta, Linea) para detectar
+    duplicados y registros fuera de orden que cruzan el límite de un lote.
+    """
+
+    def __init__(self):
+        self.ultima_fecha = {}   # (Planta, Linea) -> última fecha aceptada (int64)
+        self._aceptadas = {}     # (Planta, Linea) -> arrays de fechas aceptadas
+        self._ordenadas = set()  # series cuyo único array ya está ordenado
+        self._pendientes = []    # lotes aceptados aún sin repartir por serie
+        self._tipo_fecha = None
+        self._cuarentena = []
+        self._conteos = []
+        self.segundos = 0.0
+        self.n_lotes = 0
+
+    def validar_lote(self, lote, fecha_original=None):
+        """Devuelve las filas válidas del lote; las inválidas pasan a cuarentena.
+
+        ``fecha_original`` es la columna de fecha sin convertir, para distinguir
+        fechas vacías de fechas no parseables (ambas llegan como NaT).
+        Produccion y Defectos de las filas devueltas son siempre numéricos, aunque
+        read_csv haya leído como texto la columna de algún lote.
+        """
+        t0 = time.perf_counter()
+        n = len(lote)
+        mascara = np.zeros(n, dtype=np.uint16)
+        avisos = np.zeros(n, dtype=np.uint8)
+
+        def marcar(filas, motivo):
+            # filas: máscara booleana o posiciones enteras (casi nunca hay alguna)
+            if len(filas) and (filas.dtype != bool or filas.any()):
+                mascara[filas] |= MOTIVOS[motivo]
+
+        fecha = lote["Fecha"]
+        prod, prod_vacia, prod_invalida = _numerico(lote["Produccion"])
+        defe, def_vacia, def_invalida = _numerico(lote["Defectos"])
+
+        # Cada columna de texto se factoriza una sola vez; el resto de reglas
+        # trabaja sobre códigos enteros (mucho más barato que agrupar por texto)
+        codigos_planta, plantas = _codigos(lote["Planta"])
+        codigos_linea, lineas = _codigos(lote["Linea"])
+
+        # Fechas como int64 en su unidad nativa (sin convertir a ns); todas las
+        # fechas guardadas entre lotes usan la unidad del primer lote
+        if self._tipo_fecha is None:
+            self._tipo_fecha = fecha.dtype
+        elif fecha.dtype != self._tipo_fecha:
+            fecha = fecha.astype(self._tipo_fecha)
+        fecha_i8 = fecha.to_numpy().view("i8")
+
+        # Nulos y valores no interpretables
+        fecha_nat = fecha_i8 == NAT_I8
+        fecha_vacia = fecha_nat.copy()
+        if fecha_original is not None and fecha_nat.any():
+            # Solo hace falta mirar el texto original de las filas NaT
+            fecha_vacia[fecha_nat] = fecha_original[fecha_nat].isna().to_numpy()
+        planta_nula = pd.isna(plantas)
+        if planta_nula.any():
+            marcar(planta_nula[codigos_planta], "planta_nula")
+        marcar(fecha_vacia, "fecha_nula")
+        marcar(fecha_nat & ~fecha_vacia, "fecha_invalida")
+        marcar(prod_vacia, "produccion_nula")
+        if prod_invalida is not None:
+            marcar(prod_invalida, "produccion_invalida")
+        if def_invalida is not None:
+            marcar(def_invalida, "defectos_invalidos")
+
+        # Conteos imposibles (las comparaciones con NaN son False)
+        prod_negativa = prod < 0
+        marcar(prod_negativa, "produccion_negativa")
+        marcar(defe < 0, "defectos_negativos")
+        # Conteos con decimales (no aplica si la columna ya es entera)
+        for columna, valores in (("Produccion", prod), ("Defectos", defe)):
+            if lote[columna].dtype.kind not in "iu":
+                marcar(_no_enteros(valores), "conteo_no_entero")
+        # Solo se compara con una producción válida, para no contar dos veces
+        # la misma fila (p. ej. -1,0 ya es produccion_negativa)
+        marcar((defe > prod) & ~prod_negativa, "defectos_mayor_produccion")
+
+        # Código entero por serie (Planta, Linea), denso y pequeño: no hace falta
+        # volver a factorizar, los tramos de cada serie salen de un bincount
+        n_lineas = max(len(lineas), 1)
+        codigos_serie = codigos_planta.astype(np.int32) * n_lineas + codigos_linea
+        tamanos = np.bincount(codigos_serie, minlength=max(len(plantas), 1) * n_lineas)
+        series = np.flatnonzero(tamanos)
+        valores_planta, valores_linea = plantas.tolist(), lineas.tolist()
+        claves = {c: (valores_planta[c // n_lineas], valores_linea[c % n_lineas])
+                  for c in series.tolist()}
+
+        # Orden y duplicados solo se evalúan sobre filas que ya pasaron el resto
+        # de reglas: una fila rechazada no cuenta como primera aparición ni
+        # adelanta el máximo de su serie
+        candidata_valida = mascara == 0
+        fechas_validas = fecha_i8[candidata_valida]
+        series_validas = codigos_serie[candidata_valida]
+
+        if self._siempre_avanza(fechas_validas, series_validas, claves):
+            # Caso habitual: nada fuera de orden ni duplicado; la última fecha de
+            # cada serie es su máximo
+            ultimas = np.full(len(tamanos), NAT_I8)
+            np.maximum.at(ultimas, series_validas, fechas_validas)
+            for c in series:
+                if ultimas[c] != NAT_I8:
+                    self.ultima_fecha[claves[c]] = int(ultimas[c])
+        else:
+            self._orden_y_duplicados(fecha_i8, codigos_serie, tamanos, series, claves,
+                                     candidata_valida, mascara, avisos)
+
+        valido = mascara == 0
+        if not np.array_equal(valido, candidata_valida):
+            fechas_validas = fecha_i8[valido]
+            series_validas = codigos_serie[valido]
+        # Fechas aceptadas para buscar duplicados en lotes posteriores; se
+        # reparten por serie solo si alguna vez hace falta consultarlas
+        if len(fechas_validas):
+            self._pendientes.append((series_validas, fechas_validas, claves))
+
+        # Cuarentena con los valores originales, tal como llegaron (el texto de
+        # los motivos se genera al pedir la tabla)
+        invalido = ~valido
+        if invalido.any():
+            self._cuarentena.append((lote[invalido], mascara[invalido], self.n_lotes))
+
+        # Conteos por planta y regla: las filas por planta salen de los tamaños
+        # por serie; solo las filas marcadas (pocas) se desglosan por combinación
+        k = len(plantas)
+        nombres = ["filas", "cuarentena", *MOTIVOS, *AVISOS]
+        conteos = np.zeros((k, len(nombres)), dtype=np.int64)
+        conteos[:, 0] = tamanos.reshape(-1, n_lineas).sum(axis=1)[:k]
+        marcada = invalido | (avisos != 0) if avisos.any() else invalido
+        if marcada.any():
+            # Una clave entera por (planta, máscara, avisos): np.unique en 1D es rápido
+            clave = ((codigos_planta[marcada].astype(np.int64) << 24)
+                     | (mascara[marcada].astype(np.int64) << 8)
+                     | avisos[marcada])
+            combinaciones, veces = np.unique(clave, return_counts=True)
+            bits = [(1 + i, bit) for i, bit in enumerate(MOTIVOS.values(), start=1)]
+            bits_aviso = [(1 + len(MOTIVOS) + i, bit)
+                          for i, bit in enumerate(AVISOS.values(), start=1)]
+            for combinacion, v in zip(combinaciones, veces):
+                c, m, a = combinacion >> 24, (combinacion >> 8) & 0xFFFF, combinacion & 0xFF
+                columnas = [i for i, bit in bits if m & bit]
+                columnas += [i for i, bit in bits_aviso if a & bit]
+                columnas += [1] if m else []
+                conteos[c, columnas] += v
+        conteos = pd.DataFrame(conteos, columns=nombres,
+                               index=pd.Index(plantas, name="Planta").fillna(SIN_PLANTA))
+        self._conteos.append(conteos)
+
+        # Si algún conteo llegó como texto, las filas aceptadas llevan el valor
+        # convertido (ya comprobado) para que sumas y comparaciones sean numéricas
+        convertidas = {columna: valores
+                       for columna, valores in (("Produccion", prod), ("Defectos", defe))
+                       if lote[columna].dtype.kind not in "iuf"}
+        if convertidas:
+            lote = lote.assign(**convertidas)
+
+        self.n_lotes += 1
+        self.segundos += time.perf_counter() - t0
+        return lote if valido.all() else lote[valido]
+
+    def _siempre_avanza(self, fechas, series, claves):
+        # True si cada fila válida es posterior a todas las anteriores de su serie,
+        # también las de lotes previos. Comprobación barata para el caso habitual
+        # (archivo ordenado por fecha y, dentro de cada fecha, por serie); si no
+        # se cumple se hace el cálculo general por serie.
+        if len(fechas) == 0:
+            return True
+        if not (fechas[1:] >= fechas[:-1]).all():
+            return False
+        if not ((fechas[1:] > fechas[:-1]) | (series[1:] > series[:-1])).all():
+            return False
+        previas = {c: self.ultima_fecha[claves[c]] for c in claves
+                   if claves[c] in self.ultima_fecha}
+        if not previas or fechas[0] > max(previas.values()):
+            return True
+        # Solo las primeras filas del lote pueden no superar la fecha previa
+        m = np.searchsorted(fechas, max(previas.values()), side="right")
+        previa = np.full(max(claves) + 1, NAT_I8)
+        previa[list(previas)] = list(previas.values())
+        return bool((fechas[:m] > previa[series[:m]]).all())
+
+    def _orden_y_duplicados(self, fecha_i8, codigos_serie, tamanos, series, claves,
+                            candidata_valida, mascara, avisos):
+        # Cálculo general: máximo previo de cada fila dentro de su serie, avisos
+        # de fuera de orden y duplicados contra este lote y los anteriores
+        n = len(fecha_i8)
+        fines = np.cumsum(tamanos)
+        inicios = fines - tamanos
+
+        # Filas agrupadas por serie (dentro de cada serie, en el orden del archivo)
+        orden = _orden_por_serie(codigos_serie, len(tamanos))
+        enteros = np.where(candidata_valida, fecha_i8, NAT_I8)[orden]
+
+        # Máximo previo partiendo de la última fecha aceptada en lotes anteriores
+        # (en int64 NaT es el mínimo). Se trabaja en el orden por serie y solo se
+        # vuelven a posiciones de fila las (pocas) filas marcadas.
+        maximo = np.empty(n, dtype=np.int64)
+        for c in series:
+            i, j = inicios[c], fines[c]
+            maximo[i] = self.ultima_fecha.get(claves[c], NAT_I8)
+            maximo[i + 1:j] = enteros[i:j - 1]
+            np.maximum.accumulate(maximo[i:j], out=maximo[i:j])
+
+        # Solo puede ser duplicada o estar fuera de orden una fila que no avanza
+        # el máximo de su serie (las filas no candidatas valen NaT y se excluyen)
+        repetible_orden = np.flatnonzero((enteros <= maximo) & (enteros != NAT_I8))
+        if len(repetible_orden):
+            # Fuera de orden: fecha anterior a una ya aceptada en la serie
+            fuera = repetible_orden[enteros[repetible_orden] < maximo[repetible_orden]]
+            avisos[orden[fuera]] |= AVISOS["fuera_de_orden"]
+
+            # Duplicados, solo en las series con filas repetibles. Las fechas de la
+            # serie se ordenan (de forma estable: a igual fecha manda el orden
+            # del archivo) y se comparan entre sí y con las de lotes anteriores.
+            duplicado = []
+            for c in np.unique(codigos_serie[orden[repetible_orden]]):
+                i, j = inicios[c], fines[c]
+                o = np.argsort(enteros[i:j], kind="stable")
+                f = enteros[i:j][o]
+
+                # Dentro del lote: se conserva la primera aparición
+                duplicado.append(i + o[1:][(f[1:] == f[:-1]) & (f[1:] != NAT_I8)])
+
+                # Contra las fechas aceptadas en lotes anteriores (una fila que
+                # avanza el máximo no puede coincidir con ninguna)
+                aceptadas = self._fechas_aceptadas(claves[c])
+                if len(aceptadas):
+                    k = np.minimum(np.searchsorted(aceptadas, f), len(aceptadas) - 1)
+                    duplicado.append(i + o[(aceptadas[k] == f) & (f != NAT_I8)])
+            mascara[orden[np.concatenate(duplicado)]] |= MOTIVOS["duplicado"]
+
+        # Última fecha por serie: el último máximo acumulado o la última fila
+        # (los duplicados nunca lo superan); sin filas válidas no cambia
+        for c in series:
+            i, j = inicios[c], fines[c]
+            ultima = max(maximo[j - 1], enteros[j - 1])
+            if ultima != NAT_I8:
+                self.ultima_fecha[claves[c]] = int(ultima)
+
+    def _fechas_aceptadas(self, clave):
+        # Reparte por serie los lotes pendientes y une y ordena bajo demanda las
+        # fechas aceptadas de una serie; solo se llama para series con filas que
+        # no avanzan su máximo
+        for series, fechas, claves in self._pendientes:
+            tamanos = np.bincount(series)
+            fines = np.cumsum(tamanos)
+            por_serie = fechas[_orden_por_serie(series, len(tamanos))]
+            for c in np.flatnonzero(tamanos):
+                self._aceptadas.setdefault(claves[c], []).append(
+                    por_serie[fines[c] - tamanos[c]:fines[c]])
+                self._ordenadas.discard(claves[c])
+        self._pendientes.clear()
+
+        partes = self._aceptadas.get(clave, [])
+        if not partes:
+            return np.array([], dtype=np.int64)
+        if len(partes) > 1 or clave not in self._ordenadas:
+            partes[:] = [np.sort(np.concatenate(partes))]
+            self._ordenadas.add(clave)
+        return partes[0]
+
+    # ============================
+    # 3. Resultados
+    # ============================
+    def cuarentena(self):
+        """Tabla lateral con las filas rechazadas, sus motivos y el lote de origen."""
+        if not self._cuarentena:
+            return pd.DataFrame(columns=CLAVE + ["Produccion", "Defectos", "motivos", "lote"])
+        return pd.concat([
+            filas.assign(motivos=_texto_motivos(mascaras, MOTIVOS), lote=n_lote)
+            for filas, mascaras, n_lote in self._cuarentena
+        ], ignore_index=True)
+
+    def metricas(self):
+        """Filas, cuarentena, % de calidad y conteo por regla para cada planta."""
+        if not self._conteos:
+            return pd.DataFrame()
+        m = pd.concat(self._conteos).groupby(level=0).sum().astype(int)
+        m["validas"] = m["filas"] - m["cuarentena"]
+        m["calidad_%"] = (100 * m["validas"] / m["filas"]).round(2)
+        columnas = ["filas", "validas", "cuarentena", "calidad_%"]
+        return m[columnas + [c for c in m.columns if c not in columnas]]
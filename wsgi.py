@@ -0,0 +1,22 @@
+# wsgi.py
+# Punto de entrada de producción:
+#   gunicorn -c gunicorn.conf.py wsgi:server
+from flask import jsonify
+
+import app as dashboard
+
+server = dashboard.server
+
+
+# ============================
+# Sonda de readiness
+# ============================
+# Con preload_app gunicorn importa app.py (CSV + validación + particiones) en el
+# maestro antes de abrir el socket y crear workers, así que cualquier worker que
+# responda ya tiene los datos: readiness equivale a haber terminado el import.
+# Solo falla si la carga terminó sin ninguna fila válida.
+@server.route("/ready")
+def ready():
+    if dashboard.df.empty:
+        return jsonify(status="sin datos"), 503
+    return jsonify(status="ready", filas=int(len(dashboard.df))), 200